@@ -1,4 +1,5 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 import json
 import logging
 from pathlib import Path
@@ -7,10 +8,50 @@ from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError
 from boto3.session import Session
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 # boto has a default timeout of 60 seconds which can be
 # surpassed when generating multiple images.
-config = Config(read_timeout=300)
+# The connection pool bounds how many requests one client can keep in flight
+# over reused (already TLS-negotiated) connections.
+MAX_POOL_CONNECTIONS = 10
+config = Config(read_timeout=300, max_pool_connections=MAX_POOL_CONNECTIONS)
+
+
+def _dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize data to UTF-8 JSON bytes, using orjson when it is installed.
+
+    Requests can embed several multi-megabyte base64 images, which orjson encodes
+    considerably faster than the standard library and returns directly as bytes.
+
+    Args:
+        data (Any): JSON-serializable data.
+        indent (bool): Whether to pretty-print with a two-space indent. Defaults to False.
+
+    Returns:
+        bytes: The encoded JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=2 if indent else None).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    """Deserialize a JSON document, using orjson when it is installed.
+
+    Args:
+        data (bytes): The encoded JSON document.
+
+    Returns:
+        Any: The decoded data.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 class ImageGenerationError(Exception):
@@ -35,6 +76,8 @@ class BedrockImageGenerator:
     Attributes:
         DEFAULT_MODEL_ID (str): The default AWS Bedrock model ID for image generation.
         DEFAULT_REGION (str): The default AWS region for the Bedrock service.
+        MAX_IMAGES_PER_REQUEST (int): The most images one request can ask for via numberOfImages.
+            Batching images into one request shares the model's per-request overhead.
         region_name (str): The AWS region being used.
         endpoint_url (Optional[str]): Custom endpoint URL for the AWS service, if any.
         output_directory (Path): Directory path where generated files will be saved.
@@ -43,11 +86,13 @@ class BedrockImageGenerator:
 
     DEFAULT_MODEL_ID: str = "amazon.nova-canvas-v1:0"
     DEFAULT_REGION: str = "us-east-1"
+    MAX_IMAGES_PER_REQUEST: int = 5
 
     def __init__(
         self,
         region_name: str = DEFAULT_REGION,
         output_directory: str = "./output",
+        bedrock_client: Optional[Any] = None,
     ) -> None:
         """Initialize the BedrockImageGenerator.
 
@@ -55,16 +100,28 @@ class BedrockImageGenerator:
             region_name (str): AWS region name. Defaults to DEFAULT_REGION.
             endpoint_url (Optional[str]): Optional custom endpoint URL for the AWS service.
             output_directory (str): Directory path for saving output files. Defaults to "./output".
+            bedrock_client (Optional[boto3.client]): An existing bedrock-runtime client to reuse.
+                boto3 clients are thread-safe, so one client can be shared by several generators
+                to skip the session, credential and endpoint setup. Defaults to creating a new one.
 
         Raises:
             ImageGenerationError: If the Bedrock client initialization fails.
         """
         self.region_name = region_name
         self.output_directory = Path(output_directory)
-        self.bedrock_client = self._initialize_bedrock_client()
+        if bedrock_client is None:
+            bedrock_client = self.create_bedrock_client(self.region_name)
+        self.bedrock_client = bedrock_client
+
+    @staticmethod
+    def create_bedrock_client(region_name: str = DEFAULT_REGION) -> boto3.client:
+        """Create and return an AWS Bedrock runtime client.
 
-    def _initialize_bedrock_client(self) -> boto3.client:
-        """Initialize and return the AWS Bedrock client.
+        The client is thread-safe, so callers can create it once and pass it to several
+        generators through the bedrock_client argument.
+
+        Args:
+            region_name (str): AWS region name. Defaults to DEFAULT_REGION.
 
         Returns:
             boto3.client: Initialized Bedrock client.
@@ -76,7 +133,7 @@ class BedrockImageGenerator:
             session = Session()
             return session.client(
                 service_name="bedrock-runtime",
-                region_name=self.region_name,
+                region_name=region_name,
                 config=config
             )
         except (BotoCoreError, ClientError) as e:
@@ -95,8 +152,8 @@ class BedrockImageGenerator:
         """
         try:
             filepath = self.output_directory / filename
-            with filepath.open("w") as f:
-                json.dump(data, f, indent=2)
+            with filepath.open("wb") as f:
+                f.write(_dumps(data, indent=True))
         except IOError as e:
             logger.error(f"Failed to save {filename}: {str(e)}")
             raise ImageGenerationError(f"Failed to save {filename}") from e
@@ -136,6 +193,7 @@ class BedrockImageGenerator:
         self,
         inference_params: Dict[str, Any],
         model_id: str = DEFAULT_MODEL_ID,
+        request_label: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Generate images using AWS Bedrock's image generation models.
 
@@ -150,6 +208,10 @@ class BedrockImageGenerator:
             inference_params (Dict[str, Any]): Dictionary containing the parameters for image generation.
                 Must include required fields as per AWS Bedrock's API specifications.
             model_id (str): The model ID to use for generation. Defaults to DEFAULT_MODEL_ID.
+            request_label (Optional[str]): Suffix for the saved request and response files,
+                e.g. "2" writes request_2.json. Concurrent calls sharing an output directory
+                need distinct labels so they don't overwrite each other's files.
+                Defaults to no suffix.
 
         Returns:
             Dict[str, Any]: Dictionary containing the complete response from the model, including
@@ -159,6 +221,7 @@ class BedrockImageGenerator:
             ImageGenerationError: If any error occurs during the generation process,
                 including AWS service errors or file I/O errors.
         """
+        suffix = f"_{request_label}" if request_label else ""
         try:
             # Create output directory if it doesn't exist
             self.output_directory.mkdir(parents=True, exist_ok=True)
@@ -166,8 +229,8 @@ class BedrockImageGenerator:
             self._log_generation_details(inference_params, model_id)
 
             # Prepare and save request
-            body_json = json.dumps(inference_params, indent=2)
-            self._save_json_to_file(json.loads(body_json), "request.json")
+            body_json = _dumps(inference_params)
+            self._save_json_to_file(inference_params, f"request{suffix}.json")
 
             # Make the API call
             response = self.bedrock_client.invoke_model(
@@ -179,12 +242,12 @@ class BedrockImageGenerator:
 
             # Save response metadata
             self._save_json_to_file(
-                response.get("ResponseMetadata", {}), "response_metadata.json"
+                response.get("ResponseMetadata", {}), f"response_metadata{suffix}.json"
             )
 
             # Process and save response body
-            response_body = json.loads(response.get("body").read())
-            self._save_json_to_file(response_body, "response_body.json")
+            response_body = _loads(response.get("body").read())
+            self._save_json_to_file(response_body, f"response_body{suffix}.json")
 
             # Log request ID for tracking
             request_id = response.get("ResponseMetadata", {}).get("RequestId")
@@ -205,7 +268,7 @@ class BedrockImageGenerator:
         except (BotoCoreError, ClientError) as e:
             logger.error(f"AWS service error: {str(e)}")
             if hasattr(e, "response"):
-                self._save_json_to_file(e.response, "error_response.json")
+                self._save_json_to_file(e.response, f"error_response{suffix}.json")
             raise ImageGenerationError(
                 "Failed to generate images: AWS service error"
             ) from e
@@ -215,3 +278,41 @@ class BedrockImageGenerator:
             raise ImageGenerationError(
                 "Unexpected error during image generation"
             ) from e
+
+    def generate_many(
+        self,
+        params_list: List[Dict[str, Any]],
+        model_id: str = DEFAULT_MODEL_ID,
+        max_concurrency: int = 4,
+    ) -> List[Dict[str, Any]]:
+        """Generate images for several requests concurrently.
+
+        Bedrock calls are I/O-bound, so the requests run on a thread pool and share this
+        generator's client. Every call reuses the client's pool of open connections instead
+        of paying for connection setup and TLS negotiation per request. Each request should
+        still batch its images through numberOfImages; this method is for workloads that
+        need more images than one request allows, and it is the only place requests are
+        fanned out. The Streamlit app never needs it, since its image slider stays within
+        a single request. Each request's JSON files are saved with its 1-based position
+        in params_list as a suffix, e.g. request_2.json.
+
+        Args:
+            params_list (List[Dict[str, Any]]): The inference parameters for each request.
+            model_id (str): The model ID to use for generation. Defaults to DEFAULT_MODEL_ID.
+            max_concurrency (int): Maximum number of requests in flight at once. Values above
+                MAX_POOL_CONNECTIONS are capped, since extra threads would wait for a
+                connection. Defaults to 4.
+
+        Returns:
+            List[Dict[str, Any]]: The response for each request, in the order of params_list.
+
+        Raises:
+            ImageGenerationError: If any of the requests fails.
+        """
+        max_workers = max(1, min(max_concurrency, MAX_POOL_CONNECTIONS, len(params_list)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.generate_images, params, model_id, str(i))
+                for i, params in enumerate(params_list, start=1)
+            ]
+            return [future.result() for future in futures]
@@ -1,12 +1,22 @@
 import streamlit as st
-import base64
+import hashlib
 import io
+import json
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from random import randint
-from PIL import Image
-from amazon_image_gen import BedrockImageGenerator
-import file_utils
+from random import getrandbits
+# PIL, amazon_image_gen (which pulls in boto3) and file_utils are imported inside the
+# functions that use them, so the first page render doesn't wait on those imports
+
+# pybase64 is a SIMD-accelerated drop-in for the stdlib base64 module; use it when installed
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+logger = logging.getLogger(__name__)
 
 # Set page configuration
 st.set_page_config(
@@ -15,6 +25,15 @@ st.set_page_config(
     layout="wide"
 )
 
+# Largest seed value accepted by Nova Canvas
+MAX_SEED = 858993459
+
+# Function to draw a random seed in [0, MAX_SEED] with a single C call.
+# MAX_SEED is (2**32 - 1) // 5, so dividing 32 random bits by 5 covers the range exactly;
+# only MAX_SEED itself is slightly less likely than the other values.
+def _fast_seed():
+    return getrandbits(32) // 5
+
 # Initialize session state variables if they don't exist
 if 'output_directory' not in st.session_state:
     generation_id = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -23,35 +42,233 @@ if 'output_directory' not in st.session_state:
 if 'generated_images' not in st.session_state:
     st.session_state.generated_images = []
 
+# Pick the seed input's default once per session so it doesn't change on every rerun
+if 'default_seed' not in st.session_state:
+    st.session_state.default_seed = _fast_seed()
+
+# Function to encode raw image bytes (bytes or a memoryview) to base64
+def encode_bytes_to_base64(mv):
+    return base64.b64encode(mv).decode("ascii")
+
+# Function to base64-encode an upload once per file. The leading underscore keeps
+# Streamlit from hashing the bytes, so reruns are keyed on file_id and size alone.
+# The cache is process-wide, so it is bounded to keep every session's uploads from piling up.
+@st.cache_data(max_entries=16, show_spinner=False)
+def _b64_of_upload(file_id, size, _data):
+    return encode_bytes_to_base64(_data)
+
 # Function to encode image to base64
-def encode_image_to_base64(image_file):
+# getbuffer() exposes the upload as a zero-copy memoryview, unlike getvalue() which copies it.
+# Pass image_bytes when the caller already holds the upload's buffer.
+def encode_image_to_base64(image_file, image_bytes=None):
     if image_file is not None:
-        bytes_data = image_file.getvalue()
-        return base64.b64encode(bytes_data).decode("utf-8")
+        if image_bytes is None:
+            image_bytes = image_file.getbuffer()
+        return _b64_of_upload(image_file.file_id, image_file.size, image_bytes)
     return None
 
+# Function to get the output_format matching an upload, so st.image serves the uploaded
+# bytes as-is instead of guessing a format and re-encoding them to it
+def _upload_format(image_file):
+    return "PNG" if image_file.type == "image/png" else "JPEG"
+
+# Bounding box for the gallery thumbnails; each column renders well below this width
+THUMBNAIL_SIZE = (512, 512)
+
+# Function to build a small thumbnail for display alongside the full-resolution PNG bytes
+# for download from a generated image's bytes
+def _thumbnail_and_png(image_bytes):
+    from PIL import Image
+    
+    thumb = Image.open(io.BytesIO(image_bytes))
+    
+    # Nova Canvas returns PNG, so the image's bytes go to the download button untouched.
+    # Anything else is converted once; the result is returned as bytes rather than a
+    # getbuffer() view because st.cache_data has to pickle it.
+    if thumb.format == "PNG":
+        png_bytes = image_bytes
+    else:
+        buf = io.BytesIO()
+        thumb.save(buf, format="PNG")
+        png_bytes = buf.getvalue()
+    
+    thumb.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    buf_thumb = io.BytesIO()
+    # JPEG has no alpha channel, so transparent results (e.g. background removal) stay PNG
+    thumb_format = "PNG" if thumb.mode in ("RGBA", "LA", "P") else "JPEG"
+    if thumb_format == "PNG":
+        thumb.save(buf_thumb, format="PNG")
+    else:
+        thumb.convert("RGB").save(buf_thumb, format="JPEG", quality=85)
+    return buf_thumb.getvalue(), thumb_format, png_bytes
+
+# Function to read a saved image once and cache its thumbnail and PNG bytes. mtime_ns is
+# part of the cache key because each generation overwrites the session's output files.
+@st.cache_data(max_entries=32, show_spinner=False)
+def _load_with_thumbnail(image_path, mtime_ns):
+    with open(image_path, "rb") as f:
+        return _thumbnail_and_png(f.read())
+
+# Function to get the paths of the generated images. A pending background save is resolved
+# first, so reruns never read files that are still being written, and its return value
+# supplies the real paths.
+def _resolve_generated_image_paths():
+    pending_save = st.session_state.pop("pending_save", None)
+    if pending_save is not None:
+        try:
+            image_paths = pending_save.result()
+        except Exception:
+            image_paths = []
+            st.error("Failed to save generated images. Check the logs for details.")
+        if not isinstance(image_paths, (list, tuple)):
+            logger.error(f"file_utils.save_base64_images returned {image_paths!r}, not a list of paths")
+            st.error("Could not locate the saved images. Check the logs for details.")
+            image_paths = []
+        st.session_state.generated_images = [str(path) for path in image_paths]
+    return st.session_state.generated_images
+
+# Function to get the thumbnail and PNG bytes of each generated image. The run that generated
+# the images renders them from the in-memory response, so it doesn't wait for the background
+# save; later reruns read the saved files and skip any that are missing or unreadable.
+def _load_generated_images():
+    fresh_images = st.session_state.pop("fresh_images", None)
+    if fresh_images is not None:
+        return [
+            _thumbnail_and_png(base64.b64decode(image_base64, validate=False))
+            for image_base64 in fresh_images
+        ]
+    
+    loaded = []
+    for image_path in _resolve_generated_image_paths():
+        try:
+            loaded.append(_load_with_thumbnail(image_path, os.stat(image_path).st_mtime_ns))
+        # OSError covers missing files as well as PIL's UnidentifiedImageError and truncated images
+        except OSError as e:
+            logger.warning(f"Could not load generated image {image_path}: {e}")
+    return loaded
+
 # Function to display generated images
-def display_generated_images(images_list):
-    if not images_list:
+def display_generated_images():
+    images = _load_generated_images()
+    if not images:
         return
     
-    cols = st.columns(min(3, len(images_list)))
-    for i, image_base64 in enumerate(images_list):
+    cols = st.columns(min(3, len(images)))
+    for i, (thumb_bytes, thumb_format, png_bytes) in enumerate(images):
         with cols[i % 3]:
-            image_bytes = base64.b64decode(image_base64)
-            image = Image.open(io.BytesIO(image_bytes))
-            st.image(image, use_column_width=True)
+            # An explicit output_format that matches the bytes stops st.image from
+            # guessing a format and re-encoding the thumbnail to match it
+            st.image(thumb_bytes, width="stretch", output_format=thumb_format)
             
             # Add download button for each image
-            buf = io.BytesIO()
-            image.save(buf, format="PNG")
             btn = st.download_button(
                 label=f"Download Image {i+1}",
-                data=buf.getvalue(),
+                data=png_bytes,
                 file_name=f"generated_image_{i+1}.png",
                 mime="image/png"
             )
 
+# One Bedrock client shared by all sessions, so the boto3 session, credential
+# resolution and endpoint setup only happen once per process
+@st.cache_resource(show_spinner=False)
+def _get_bedrock_client():
+    from amazon_image_gen import BedrockImageGenerator
+    return BedrockImageGenerator.create_bedrock_client()
+
+# Function to get the generator for an output directory, reusing the shared Bedrock client
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _get_generator(output_dir):
+    from amazon_image_gen import BedrockImageGenerator
+    return BedrockImageGenerator(output_directory=output_dir, bedrock_client=_get_bedrock_client())
+
+# Function to build the imageGenerationConfig shared by the generation features.
+# All N images always go into one request via numberOfImages: the service shares the
+# model's per-request overhead across the batch, which is far faster than N separate calls.
+def _build_image_gen_config(num_images, quality, width, height, cfg_scale, seed_fn):
+    config = {
+        "numberOfImages": num_images,
+        "quality": quality,
+        "cfgScale": cfg_scale,
+        "seed": seed_fn(),
+    }
+    if width is not None and height is not None:
+        config["width"] = width
+        config["height"] = height
+    return config
+
+# Function to fingerprint a request so identical requests share a cache entry
+def _fingerprint_inference_params(inference_params):
+    params_json = json.dumps(inference_params, sort_keys=True).encode()
+    return hashlib.blake2b(params_json, digest_size=16).hexdigest()
+
+# Raised inside _cached_generate for responses without images. st.cache_data doesn't
+# store results of calls that raise, so a transient error body is never replayed.
+class _UncachedResponse(Exception):
+    def __init__(self, response):
+        super().__init__("Response contained no images")
+        self.response = response
+
+# Function to replay responses for requests that were already sent to Bedrock.
+# Only the fingerprint is hashed by Streamlit; the generator and parameters are passed through.
+@st.cache_data(max_entries=16, persist="disk", show_spinner=False)
+def _cached_generate(key, _generator, _inference_params):
+    response = _generator.generate_images(_inference_params)
+    if "images" not in response:
+        raise _UncachedResponse(response)
+    return response
+
+# Function to send the single batched Bedrock request for a feature, going through the
+# response cache when use_cache is set. The "Number of Images" slider stops at the
+# per-request limit, so every click is exactly one request.
+# Set use_cache only for deterministic requests (fixed seed or no seed); random seeds never repeat.
+def run_generation(generator, inference_params, use_cache=False):
+    if use_cache:
+        try:
+            return _cached_generate(
+                _fingerprint_inference_params(inference_params), generator, inference_params
+            )
+        except _UncachedResponse as e:
+            return e.response
+    return generator.generate_images(inference_params)
+
+# Function to log failures of a background save, which would otherwise be dropped silently
+def _log_save_failure(future):
+    if future.exception() is not None:
+        logger.error(f"Failed to save generated images: {future.exception()}")
+
+# Process-wide pool for disk saves, shared by every session. Each session waits only on
+# its own save future, and the pool is sized so concurrent sessions' saves don't queue
+# behind each other
+SAVE_WORKERS = 16
+
+@st.cache_resource
+def _get_save_executor():
+    return ThreadPoolExecutor(max_workers=SAVE_WORKERS, thread_name_prefix="image-save")
+
+# Function to write generated images to disk on a background thread so the UI can repaint meanwhile
+def save_images_in_background(images, output_directory):
+    import file_utils
+    
+    future = _get_save_executor().submit(file_utils.save_base64_images, images, output_directory, "image")
+    future.add_done_callback(_log_save_failure)
+    return future
+
+# Function to save a fresh response's images in the background. Session state keeps the
+# save's future and, once it resolves, only the saved paths, so the base64 payloads aren't
+# held for the whole session.
+def store_generated_images(images):
+    # The new save may overwrite the previous one's files, so let that one finish first
+    previous_save = st.session_state.pop("pending_save", None)
+    if previous_save is not None:
+        wait([previous_save])
+    
+    st.session_state.pending_save = save_images_in_background(
+        images, st.session_state.output_directory
+    )
+    st.session_state.generated_images = []
+    # Rendered once from memory by display_generated_images in this run, then dropped
+    st.session_state.fresh_images = images
+
 # Main app title
 st.title("Image Engineering with Amazon Nova Canvas")
 st.markdown("Generate and manipulate images using Amazon Bedrock's image generation capabilities")
@@ -77,7 +294,8 @@ with st.sidebar.expander("Common Settings", expanded=True):
     cfg_scale = st.slider("CFG Scale (Prompt Adherence)", 1.0, 10.0, 7.0, 0.1)
     num_images = st.slider("Number of Images", 1, 5, 1)
     use_random_seed = st.checkbox("Use Random Seed", value=True)
-    seed = st.number_input("Seed", 0, 858993459, randint(0, 858993459), disabled=use_random_seed)
+    seed = st.number_input("Seed", 0, MAX_SEED, st.session_state.default_seed, disabled=use_random_seed)
+    seed_fn = _fast_seed if use_random_seed else (lambda: seed)
 
 # Main content area based on selected feature
 if feature == "Simple Image Generation":
@@ -104,32 +322,25 @@ if feature == "Simple Image Generation":
                     "text": text_prompt,
                     "negativeText": negative_prompt,
                 },
-                "imageGenerationConfig": {
-                    "numberOfImages": num_images,
-                    "quality": quality,
-                    "width": width,
-                    "height": height,
-                    "cfgScale": cfg_scale,
-                    "seed": randint(0, 858993459) if use_random_seed else seed,
-                },
+                "imageGenerationConfig": _build_image_gen_config(
+                    num_images, quality, width, height, cfg_scale, seed_fn
+                ),
             }
             
-            # Create the generator
-            generator = BedrockImageGenerator(output_directory=st.session_state.output_directory)
+            # Get the generator
+            generator = _get_generator(st.session_state.output_directory)
             
             # Generate the image(s)
-            response = generator.generate_images(inference_params)
+            response = run_generation(generator, inference_params, use_cache=not use_random_seed)
             
             if "images" in response:
-                st.session_state.generated_images = response["images"]
-                file_utils.save_base64_images(response["images"], st.session_state.output_directory, "image")
+                store_generated_images(response["images"])
                 st.success(f"Generated {len(response['images'])} image(s)!")
             else:
                 st.error("Failed to generate images. Check the logs for details.")
     
     # Display generated images
-    if st.session_state.generated_images:
-        display_generated_images(st.session_state.generated_images)
+    display_generated_images()
 
 elif feature == "Color-Guided Generation":
     st.header("Color-Guided Generation")
@@ -161,7 +372,7 @@ elif feature == "Color-Guided Generation":
     reference_image_base64 = encode_image_to_base64(reference_image) if reference_image else None
     
     if reference_image:
-        st.image(reference_image, caption="Reference Image", width=300)
+        st.image(reference_image.getvalue(), caption="Reference Image", width=300, output_format=_upload_format(reference_image))
     
     if st.button("Generate Images"):
         with st.spinner("Generating images..."):
@@ -172,36 +383,29 @@ elif feature == "Color-Guided Generation":
                     "text": text_prompt,
                     "colors": [color1, color2, color3, color4, color5],
                 },
-                "imageGenerationConfig": {
-                    "numberOfImages": num_images,
-                    "quality": quality,
-                    "width": width,
-                    "height": height,
-                    "cfgScale": cfg_scale,
-                    "seed": randint(0, 858993459) if use_random_seed else seed,
-                },
+                "imageGenerationConfig": _build_image_gen_config(
+                    num_images, quality, width, height, cfg_scale, seed_fn
+                ),
             }
             
             # Add reference image if provided
             if reference_image_base64:
                 inference_params["colorGuidedGenerationParams"]["referenceImage"] = reference_image_base64
             
-            # Create the generator
-            generator = BedrockImageGenerator(output_directory=st.session_state.output_directory)
+            # Get the generator
+            generator = _get_generator(st.session_state.output_directory)
             
             # Generate the image(s)
-            response = generator.generate_images(inference_params)
+            response = run_generation(generator, inference_params, use_cache=not use_random_seed)
             
             if "images" in response:
-                st.session_state.generated_images = response["images"]
-                file_utils.save_base64_images(response["images"], st.session_state.output_directory, "image")
+                store_generated_images(response["images"])
                 st.success(f"Generated {len(response['images'])} image(s)!")
             else:
                 st.error("Failed to generate images. Check the logs for details.")
     
     # Display generated images
-    if st.session_state.generated_images:
-        display_generated_images(st.session_state.generated_images)
+    display_generated_images()
 
 elif feature == "Image-Guided Generation":
     st.header("Image-Guided Generation")
@@ -217,7 +421,7 @@ elif feature == "Image-Guided Generation":
     conditioning_image = st.file_uploader("Upload a conditioning image", type=["png", "jpg", "jpeg"])
     
     if conditioning_image is not None:
-        st.image(conditioning_image, caption="Conditioning Image", width=300)
+        st.image(conditioning_image.getvalue(), caption="Conditioning Image", width=300, output_format=_upload_format(conditioning_image))
         
         # Control mode and strength
         control_mode = st.selectbox("Control Mode", ["CANNY_EDGE", "SEGMENTATION"], index=1)
@@ -237,32 +441,25 @@ elif feature == "Image-Guided Generation":
                         "controlMode": control_mode,
                         "controlStrength": control_strength,
                     },
-                    "imageGenerationConfig": {
-                        "numberOfImages": num_images,
-                        "quality": quality,
-                        "width": width,
-                        "height": height,
-                        "cfgScale": cfg_scale,
-                        "seed": randint(0, 858993459) if use_random_seed else seed,
-                    },
+                    "imageGenerationConfig": _build_image_gen_config(
+                        num_images, quality, width, height, cfg_scale, seed_fn
+                    ),
                 }
                 
-                # Create the generator
-                generator = BedrockImageGenerator(output_directory=st.session_state.output_directory)
+                # Get the generator
+                generator = _get_generator(st.session_state.output_directory)
                 
                 # Generate the image(s)
-                response = generator.generate_images(inference_params)
+                response = run_generation(generator, inference_params, use_cache=not use_random_seed)
                 
                 if "images" in response:
-                    st.session_state.generated_images = response["images"]
-                    file_utils.save_base64_images(response["images"], st.session_state.output_directory, "image")
+                    store_generated_images(response["images"])
                     st.success(f"Generated {len(response['images'])} image(s)!")
                 else:
                     st.error("Failed to generate images. Check the logs for details.")
         
         # Display generated images
-        if st.session_state.generated_images:
-            display_generated_images(st.session_state.generated_images)
+        display_generated_images()
     else:
         st.info("Please upload a conditioning image to continue")
 
@@ -290,17 +487,17 @@ elif feature == "Instant Customization":
     with col1:
         ref_image1 = st.file_uploader("Reference Image 1", type=["png", "jpg", "jpeg"])
         if ref_image1:
-            st.image(ref_image1, caption="Reference 1", use_column_width=True)
+            st.image(ref_image1.getvalue(), caption="Reference 1", width="stretch", output_format=_upload_format(ref_image1))
     
     with col2:
         ref_image2 = st.file_uploader("Reference Image 2", type=["png", "jpg", "jpeg"])
         if ref_image2:
-            st.image(ref_image2, caption="Reference 2", use_column_width=True)
+            st.image(ref_image2.getvalue(), caption="Reference 2", width="stretch", output_format=_upload_format(ref_image2))
     
     with col3:
         ref_image3 = st.file_uploader("Reference Image 3", type=["png", "jpg", "jpeg"])
         if ref_image3:
-            st.image(ref_image3, caption="Reference 3", use_column_width=True)
+            st.image(ref_image3.getvalue(), caption="Reference 3", width="stretch", output_format=_upload_format(ref_image3))
     
     similarity_strength = st.slider("Similarity Strength", 0.2, 1.0, 0.9, 0.1)
     
@@ -320,36 +517,29 @@ elif feature == "Instant Customization":
                     "text": text_prompt,
                     "similarityStrength": similarity_strength,
                 },
-                "imageGenerationConfig": {
-                    "numberOfImages": num_images,
-                    "quality": quality,
-                    "width": width,
-                    "height": height,
-                    "cfgScale": cfg_scale,
-                    "seed": randint(0, 858993459) if use_random_seed else seed,
-                },
+                "imageGenerationConfig": _build_image_gen_config(
+                    num_images, quality, width, height, cfg_scale, seed_fn
+                ),
             }
             
             # Add negative text if provided
             if negative_prompt:
                 inference_params["imageVariationParams"]["negativeText"] = negative_prompt
             
-            # Create the generator
-            generator = BedrockImageGenerator(output_directory=st.session_state.output_directory)
+            # Get the generator
+            generator = _get_generator(st.session_state.output_directory)
             
             # Generate the image(s)
-            response = generator.generate_images(inference_params)
+            response = run_generation(generator, inference_params, use_cache=not use_random_seed)
             
             if "images" in response:
-                st.session_state.generated_images = response["images"]
-                file_utils.save_base64_images(response["images"], st.session_state.output_directory, "image")
+                store_generated_images(response["images"])
                 st.success(f"Generated {len(response['images'])} image(s)!")
             else:
                 st.error("Failed to generate images. Check the logs for details.")
     
     # Display generated images
-    if st.session_state.generated_images:
-        display_generated_images(st.session_state.generated_images)
+    display_generated_images()
 
 elif feature == "Background Replacement":
     st.header("Background Replacement")
@@ -364,7 +554,9 @@ elif feature == "Background Replacement":
     source_image = st.file_uploader("Upload Source Image", type=["png", "jpg", "jpeg"])
     
     if source_image:
-        st.image(source_image, caption="Source Image", width=300)
+        # Read the upload's buffer once and reuse it for the preview and the base64 encode
+        source_bytes = source_image.getbuffer()
+        st.image(bytes(source_bytes), caption="Source Image", width=300, output_format=_upload_format(source_image))
         
         if operation_type == "Background Replacement":
             text_prompt = st.text_area(
@@ -389,7 +581,7 @@ elif feature == "Background Replacement":
             if st.button("Replace Background"):
                 with st.spinner("Processing image..."):
                     # Encode the image to base64
-                    source_image_base64 = encode_image_to_base64(source_image)
+                    source_image_base64 = encode_image_to_base64(source_image, source_bytes)
                     
                     # Configure the inference parameters
                     inference_params = {
@@ -400,23 +592,19 @@ elif feature == "Background Replacement":
                             "maskPrompt": mask_prompt,
                             "outPaintingMode": outpainting_mode,
                         },
-                        "imageGenerationConfig": {
-                            "numberOfImages": num_images,
-                            "quality": quality,
-                            "cfgScale": cfg_scale,
-                            "seed": randint(0, 858993459) if use_random_seed else seed,
-                        },
+                        "imageGenerationConfig": _build_image_gen_config(
+                            num_images, quality, None, None, cfg_scale, seed_fn
+                        ),
                     }
                     
-                    # Create the generator
-                    generator = BedrockImageGenerator(output_directory=st.session_state.output_directory)
+                    # Get the generator
+                    generator = _get_generator(st.session_state.output_directory)
                     
                     # Generate the image(s)
-                    response = generator.generate_images(inference_params)
+                    response = run_generation(generator, inference_params, use_cache=not use_random_seed)
                     
                     if "images" in response:
-                        st.session_state.generated_images = response["images"]
-                        file_utils.save_base64_images(response["images"], st.session_state.output_directory, "image")
+                        store_generated_images(response["images"])
                         st.success(f"Generated {len(response['images'])} image(s)!")
                     else:
                         st.error("Failed to generate images. Check the logs for details.")
@@ -425,7 +613,7 @@ elif feature == "Background Replacement":
             if st.button("Remove Background"):
                 with st.spinner("Removing background..."):
                     # Encode the image to base64
-                    source_image_base64 = encode_image_to_base64(source_image)
+                    source_image_base64 = encode_image_to_base64(source_image, source_bytes)
                     
                     # Configure the inference parameters
                     inference_params = {
@@ -435,22 +623,20 @@ elif feature == "Background Replacement":
                         },
                     }
                     
-                    # Create the generator
-                    generator = BedrockImageGenerator(output_directory=st.session_state.output_directory)
+                    # Get the generator
+                    generator = _get_generator(st.session_state.output_directory)
                     
                     # Generate the image(s)
-                    response = generator.generate_images(inference_params)
+                    response = run_generation(generator, inference_params, use_cache=True)
                     
                     if "images" in response:
-                        st.session_state.generated_images = response["images"]
-                        file_utils.save_base64_images(response["images"], st.session_state.output_directory, "image")
+                        store_generated_images(response["images"])
                         st.success("Background removed successfully!")
                     else:
                         st.error("Failed to remove background. Check the logs for details.")
         
         # Display generated images
-        if st.session_state.generated_images:
-            display_generated_images(st.session_state.generated_images)
+        display_generated_images()
     else:
         st.info("Please upload a source image to continue")
 